@@ -0,0 +1,96 @@
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+
+from pymongo import ReplaceOne
+
+from leases import Lease
+
+
+class IssueArchiver:
+    """Moves old issues from the hot collection into an archive collection.
+
+    `select()` returns the filter of the issues due for the archive and
+    `prepare(document)` turns an issue into its archived form. Issues are
+    moved in batches: copied to the archive first and only then deleted
+    from the hot collection, so an interrupted run loses nothing and is
+    simply picked up by the next one.
+
+    Every worker process runs the archiver in a background thread; a lease
+    document in `leases` lets only one of them work at a time.
+    """
+
+    def __init__(self, hot, archive, select, prepare=None, interval=3600, batch_size=500, leases=None, on_change=None):
+        self.hot = hot
+        self.archive = archive
+        self.select = select
+        self.prepare = prepare or (lambda document: document)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.lease = Lease(leases, "archiver", interval) if leases is not None else None
+        self.on_change = on_change
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def run_once(self):
+        """Archive every issue currently due. Returns the number of issues moved."""
+        query = self.select()
+        moved = 0
+        while True:
+            documents = list(self.hot.find(query).limit(self.batch_size))
+            if not documents:
+                break
+            issue_ids = [document["_id"] for document in documents]
+            archived_at = datetime.now(timezone.utc)
+            self.archive.bulk_write(
+                [ReplaceOne({"_id": document["_id"]}, {**self.prepare(document), "archived_at": archived_at}, upsert=True)
+                 for document in documents],
+                ordered=False,
+            )
+            deleted = self.hot.delete_many({"_id": {"$in": issue_ids}, **query}).deleted_count
+            if deleted < len(issue_ids):
+                # Issues reopened in the meantime stay hot; drop their copies
+                kept = [document["_id"] for document in self.hot.find({"_id": {"$in": issue_ids}}, {"_id": True})]
+                self.archive.delete_many({"_id": {"$in": kept}})
+            moved += deleted
+            if not deleted:
+                break
+        if moved:
+            logging.info(f"Archived {moved} issue(s)")
+            if self.on_change is not None:
+                self.on_change()
+        return moved
+
+    def restore(self, query):
+        """Move the archived issues matching `query` back to the hot collection."""
+        documents = list(self.archive.find(query))
+        if not documents:
+            return 0
+        for document in documents:
+            document.pop("archived_at", None)
+        self.hot.bulk_write([ReplaceOne({"_id": document["_id"]}, document, upsert=True) for document in documents], ordered=False)
+        self.archive.delete_many({"_id": {"$in": [document["_id"] for document in documents]}})
+        if self.on_change is not None:
+            self.on_change()
+        return len(documents)
+
+    def _run(self):
+        while True:
+            try:
+                if self.lease is None or self.lease.acquire():
+                    self.run_once()
+            except Exception as e:
+                logging.error(f"Error archiving issues: {e}")
+            time.sleep(self.interval)
+
+    def ensure_running(self):
+        """Start the archiving thread in the current process if it is not running."""
+        if self.interval <= 0 or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            threading.Thread(target=self._run, name="issue-archiver", daemon=True).start()
+            self._pid = os.getpid()
@@ -0,0 +1,391 @@
+"""Load and latency benchmark of the Flask routes.
+
+Runs the app against a local fake of the Slack Web API and a local MongoDB
+(or mongomock), seeds the issue collection, replays generated requests on
+every route and reports throughput and p50/p95/p99 latencies. Results are
+written as JSON so that two commits can be compared:
+
+    python benchmarks/bench.py --mongo mongomock --issues 10000 --output before.json
+    python benchmarks/bench.py --mongo mongomock --issues 10000 --compare before.json
+
+Never point --mongo-uri at a production cluster: the collections are dropped.
+mongomock is pure Python and much slower than mongod; its numbers are only
+comparable with other mongomock runs. Every GET route replays the same URL
+with nothing written in between, so the dashboard response cache is off
+unless --response-cache is given; otherwise only cache hits are measured.
+"""
+import os
+import sys
+import json
+import time
+import hmac
+import random
+import hashlib
+import argparse
+import platform
+import threading
+import subprocess
+import urllib.parse
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_slack import start_fake_slack  # noqa: E402
+from jobs import percentile  # noqa: E402
+
+SIGNING_SECRET = "benchmark-signing-secret"
+WORDS = ("straxen strax data availability midway dali rucio container notebook batch job "
+         "plugin context lineage peaks events run timeout memory error missing").split()
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def fake_log(rng):
+    frames = "\n".join(f'  File "/opt/XENONnT/anaconda/lib/python3.9/site-packages/straxen/{rng.choice(WORDS)}.py", '
+                       f'line {rng.randint(1, 2000)}, in {rng.choice(WORDS)}' for _ in range(rng.randint(3, 20)))
+    return f"Traceback (most recent call last):\n{frames}\nValueError: {sentence(rng, 6)}"
+
+
+def seed_issues(app_module, count, rng, batch_size=5000):
+    """Replace the issue collection with `count` generated issues."""
+    db = app_module.db
+    for name in ("jarviscoll", "jarviscounters", "jarvisblobs", "jarvisrollups", "jarvisclusters", "jarvisresponses"):
+        db[name].drop()
+    app_module.ensure_indexes()
+    issue_types = app_module.instruction_catalog.names() or ["Straxen"]
+    start = datetime(2023, 1, 1)
+    versions = [sentence(rng, 40) for _ in range(20)]
+    batch = []
+    for i in range(count):
+        submitted_at = start + timedelta(seconds=i * 60)
+        status = rng.choice(("pending", "resolved", "resolved"))
+        batch.append({
+            "user_id": f"user-U{rng.randint(0, 499):06d}",
+            "issue_type": rng.choice(issue_types),
+            "submitted_at": submitted_at,
+            "description": sentence(rng, 30),
+            "reproduce": sentence(rng, 15),
+            "machine_partition": "dali",
+            "container": "2023.06.1",
+            "status": status,
+            **({"resolved_at": submitted_at + timedelta(hours=rng.randint(1, 200))} if status == "resolved" else {}),
+            **app_module.store_blob_fields({"log": fake_log(rng), "straxen_version": rng.choice(versions)}),
+        })
+        if len(batch) >= batch_size:
+            app_module.my_collection.insert_many(batch)
+            batch = []
+    if batch:
+        app_module.my_collection.insert_many(batch)
+    app_module.rebuild_issue_counters()
+    app_module.rebuild_rollups()
+
+
+def signed_headers(body):
+    timestamp = str(int(time.time()))
+    signature = "v0=" + hmac.new(SIGNING_SECRET.encode(), f"v0:{timestamp}:{body}".encode(), hashlib.sha256).hexdigest()
+    return {
+        "X-Slack-Request-Timestamp": timestamp,
+        "X-Slack-Signature": signature,
+        "Content-Type": "application/x-www-form-urlencoded",
+    }
+
+
+class Payloads:
+    """Generators of the Slack payloads replayed against the app."""
+
+    def __init__(self, app_module, rng):
+        self.rng = rng
+        self.counter = 0
+        self.lock = threading.Lock()
+        self.issue_types = app_module.instruction_catalog.names() or ["Straxen"]
+        self.issue_ids = [str(document["_id"]) for document in
+                          app_module.my_collection.find({}, {"_id": True}).limit(1000)]
+
+    def _next(self):
+        with self.lock:
+            self.counter += 1
+            return self.counter
+
+    def form(self, fields):
+        body = urllib.parse.urlencode(fields)
+        return body, signed_headers(body)
+
+    def interaction(self, payload):
+        return self.form({"payload": json.dumps(payload)})
+
+    def help(self):
+        return self.form({"trigger_id": f"trigger-{self._next()}", "command": "/help"})
+
+    def continue_issue_selection(self):
+        n = self._next()
+        return self.interaction({
+            "type": "block_actions",
+            "actions": [{"action_id": "continue_issue_selection", "action_ts": f"{n}.0"}],
+            "view": {"id": f"V{n}", "state": {"values": {"section-1": {"issue_selection": {
+                "selected_option": {"value": self.rng.choice(self.issue_types)}}}}}},
+        })
+
+    def issue_status_change(self):
+        n = self._next()
+        status = self.rng.choice(("pending", "resolved"))
+        return self.interaction({
+            "type": "block_actions",
+            "actions": [{"action_id": "issue_status_change", "action_ts": f"{n}.0",
+                         "value": f"{self.rng.choice(self.issue_ids)}|{status}"}],
+            "channel": {"id": "C0BENCH"},
+            "message": {"ts": f"{self.rng.randint(1, 50)}.000100", "blocks": [{"type": "section"}, {"type": "actions"}]},
+        })
+
+    def view_submission(self):
+        n = self._next()
+
+        def value(action_id, text):
+            return {action_id: {"value": text}}
+        return self.interaction({
+            "type": "view_submission",
+            "user": {"id": f"U{self.rng.randint(0, 499):06d}"},
+            "view": {
+                "id": f"V{n}", "hash": f"h{n}", "callback_id": "issue_form",
+                "private_metadata": json.dumps({"selected_issue": self.rng.choice(self.issue_types)}),
+                "state": {"values": {
+                    "issue_description": value("description_input", sentence(self.rng, 30)),
+                    "issue_reproduce": value("reproduce_input", sentence(self.rng, 15)),
+                    "issue_log": value("log_input", fake_log(self.rng)),
+                    "Issue_machine_partition": value("machine_partition_input", "dali"),
+                    "issue_container": value("container_input", "2023.06.1"),
+                    "issue_straxen_version": value("straxen_version_input", sentence(self.rng, 40)),
+                }},
+            },
+        })
+
+
+def build_scenarios(app_module, payloads, text_search):
+    """(name, method, path, body factory) for every benchmarked route."""
+    deep = app_module.my_collection.find({}, {"submitted_at": True}).sort(app_module.ISSUE_SORT) \
+        .skip(max(app_module.my_collection.estimated_document_count() - 10, 0)).limit(1)
+    deep = list(deep)
+    deep_cursor = urllib.parse.quote(app_module.encode_cursor(deep[0])) if deep else ""
+    scenarios = [
+        ("POST /help", "POST", "/help", payloads.help),
+        ("POST /slack/interactions continue_issue_selection", "POST", "/slack/interactions", payloads.continue_issue_selection),
+        ("POST /slack/interactions issue_status_change", "POST", "/slack/interactions", payloads.issue_status_change),
+        ("POST /slack/interactions view_submission", "POST", "/slack/interactions", payloads.view_submission),
+        ("GET /get-issues page 1", "GET", "/get-issues?items_per_page=5", None),
+        ("GET /get-issues last page", "GET", f"/get-issues?items_per_page=5&after={deep_cursor}", None),
+        ("GET /get-issues status=pending", "GET", "/get-issues?items_per_page=5&status=pending", None),
+        ("GET /get-issue-counts", "GET", "/get-issue-counts", None),
+        ("GET /get-clusters", "GET", "/get-clusters", None),
+        ("GET /analytics/data", "GET", "/analytics/data?since=2023-01-01&until=2023-03-31", None),
+    ]
+    if text_search:
+        scenarios.append(("GET /search", "GET", "/search?q=straxen+timeout", None))
+    return scenarios
+
+
+class TestClientDriver:
+    """Calls the app in-process through Flask's test client."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        if not hasattr(self.local, "client"):
+            self.local.client = self.flask_app.test_client()
+        response = self.local.client.open(path, method=method, data=body, headers=headers)
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class WSGIServerDriver:
+    """Serves the app with a threaded WSGI server and calls it over HTTP."""
+
+    def __init__(self, flask_app):
+        import requests
+        from werkzeug.serving import make_server
+        self.requests = requests
+        self.server = make_server("127.0.0.1", 0, flask_app, threaded=True)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        if not hasattr(self.local, "session"):
+            self.local.session = self.requests.Session()
+        response = self.local.session.request(method, self.base_url + path, data=body, headers=headers)
+        return response.status_code
+
+    def close(self):
+        self.server.shutdown()
+
+
+def run_scenario(driver, scenario, requests_count, concurrency, warmup):
+    name, method, path, make_body = scenario
+
+    def one(_):
+        body, headers = make_body() if make_body else (None, None)
+        started = time.perf_counter()
+        status = driver.request(method, path, body, headers)
+        return time.perf_counter() - started, status
+
+    for i in range(warmup):
+        one(i)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests_count)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for latency, _ in results]
+    errors = sum(1 for _, status in results if status >= 400)
+    return {
+        "requests": requests_count,
+        "errors": errors,
+        "throughput_rps": round(requests_count / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def print_results(results, baseline=None):
+    header = f"{'route':<52} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"
+    print(header)
+    print("-" * len(header))
+    for name, route in results["routes"].items():
+        line = (f"{name:<52} {route['throughput_rps']:>9} {route['p50_ms']:>9} "
+                f"{route['p95_ms']:>9} {route['p99_ms']:>9} {route['errors']:>7}")
+        previous = (baseline or {}).get("routes", {}).get(name)
+        if previous and previous["p95_ms"]:
+            change = (route["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100
+            line += f"   p95 {change:+.1f}% vs {baseline['meta'].get('commit')}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--issues", type=int, default=1000, help="issues seeded before the run (default 1000)")
+    parser.add_argument("--requests", type=int, default=500, help="requests per route (default 500)")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent clients (default 4)")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per route (default 20)")
+    parser.add_argument("--driver", choices=("testclient", "wsgi"), default="testclient",
+                        help="call the app in-process or over HTTP through a threaded WSGI server")
+    parser.add_argument("--mongo", choices=("uri", "mongomock"), default="uri",
+                        help="use the MongoDB at --mongo-uri or an in-memory mongomock")
+    parser.add_argument("--mongo-uri", default="mongodb://127.0.0.1:27017/", help="local MongoDB to benchmark against")
+    parser.add_argument("--slack-latency", type=float, default=0.0, help="seconds the fake Slack API waits per call")
+    parser.add_argument("--slack-throttle", action="store_true",
+                        help="keep the app's Slack rate limiting on (off by default, the fake API has no limits)")
+    parser.add_argument("--response-cache", action="store_true",
+                        help="keep the dashboard response cache on, measuring cache hits on the GET routes")
+    parser.add_argument("--job-workers", type=int, default=4, help="background job workers (0 runs jobs inline)")
+    parser.add_argument("--route", action="append", help="only run routes whose name contains this text")
+    parser.add_argument("--seed", type=int, default=42, help="random seed of the generated data")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare the p95 latencies with")
+    args = parser.parse_args()
+
+    if args.mongo == "uri" and ("+srv" in args.mongo_uri or "mongodb.net" in args.mongo_uri):
+        parser.error("refusing to seed a hosted cluster, use a local mongod or --mongo mongomock")
+    if args.mongo == "mongomock" and args.concurrency > 1:
+        # Concurrent queries on mongomock fail with "dictionary changed size"
+        print("mongomock is not thread-safe, running the requests with --concurrency 1")
+        args.concurrency = 1
+
+    fake_slack = start_fake_slack(latency=args.slack_latency)
+    os.environ.update({
+        "SLACK_SIGNING_SECRET": SIGNING_SECRET,
+        "SLACK_BOT_TOKEN": "xoxb-benchmark",
+        "SLACK_API_URL": fake_slack.api_url,
+        "MONGODB_URI": args.mongo_uri,
+        "JOB_QUEUE_WORKERS": str(args.job_workers),
+        "INSTRUCTIONS_POLL_INTERVAL": "0",
+        "SLACK_THROTTLE": str(args.slack_throttle),
+        "RESPONSE_CACHE": "memory",
+        "RESPONSE_CACHE_SIZE": "512" if args.response_cache else "0",
+    })
+    if args.mongo == "mongomock":
+        import mongomock
+        import pymongo.mongo_client
+        shared = mongomock.MongoClient()
+        pymongo.mongo_client.MongoClient = lambda *a, **k: shared
+
+    os.chdir(ROOT)
+    import app as app_module
+    if args.mongo == "mongomock":
+        # mongomock has no aggregation expressions in find projections; the
+        # seeded issues all carry their previews, so plain inclusion is enough
+        app_module.ISSUE_SUMMARY_PROJECTION.update(log_preview=True, log_length=True)
+    app_module.app.logger.setLevel("WARNING")
+    import logging
+    logging.getLogger().setLevel(logging.WARNING)
+
+    rng = random.Random(args.seed)
+    seed_started = time.perf_counter()
+    seed_issues(app_module, args.issues, rng)
+    print(f"Seeded {args.issues} issues in {time.perf_counter() - seed_started:.1f}s")
+
+    payloads = Payloads(app_module, rng)
+    scenarios = build_scenarios(app_module, payloads, text_search=args.mongo != "mongomock")
+    if args.route:
+        scenarios = [scenario for scenario in scenarios if any(text in scenario[0] for text in args.route)]
+
+    driver = WSGIServerDriver(app_module.app) if args.driver == "wsgi" else TestClientDriver(app_module.app)
+    routes = {}
+    try:
+        for scenario in scenarios:
+            routes[scenario[0]] = run_scenario(driver, scenario, args.requests, args.concurrency, args.warmup)
+            # Let the background jobs of a route finish before measuring the next
+            drain_started = time.perf_counter()
+            app_module.job_queue.join()
+            routes[scenario[0]]["jobs_drain_s"] = round(time.perf_counter() - drain_started, 3)
+    finally:
+        driver.close()
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "issues": args.issues,
+            "requests_per_route": args.requests,
+            "concurrency": args.concurrency,
+            "driver": args.driver,
+            "mongo": args.mongo,
+            "slack_latency": args.slack_latency,
+            "job_workers": args.job_workers,
+            "slack_throttle": args.slack_throttle,
+            "response_cache": args.response_cache,
+        },
+        "routes": routes,
+        "jobs": app_module.job_queue.stats(),
+        "slack_calls": dict(fake_slack.calls),
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import json
+import time
+import threading
+from collections import Counter
+from urllib.parse import parse_qs, urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeSlackHandler(BaseHTTPRequestHandler):
+    """Answers the Web API methods the bot uses with canned successful responses."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _arguments(self):
+        arguments = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            body = self.rfile.read(length).decode()
+            if self.headers.get('Content-Type', '').startswith('application/json'):
+                arguments.update(json.loads(body))
+            else:
+                arguments.update({key: values[0] for key, values in parse_qs(body).items()})
+        return arguments
+
+    def _handle(self):
+        server = self.server
+        method = urlparse(self.path).path.rsplit('/', 1)[-1]
+        arguments = self._arguments()
+        with server.lock:
+            server.calls[method] += 1
+            server.ts += 1
+            ts = f"{int(time.time())}.{server.ts:06d}"
+        if server.latency:
+            time.sleep(server.latency)
+
+        if method == 'users.info':
+            body = {"ok": True, "user": {"id": arguments.get('user'), "name": f"user-{arguments.get('user')}"}}
+        elif method == 'users.list':
+            offset = int(arguments.get('cursor') or 0)
+            members = [{"id": f"U{i:06d}", "name": f"user-U{i:06d}"} for i in range(offset, min(offset + 200, server.users))]
+            next_cursor = str(offset + 200) if offset + 200 < server.users else ""
+            body = {"ok": True, "members": members, "response_metadata": {"next_cursor": next_cursor}}
+        elif method in ('chat.postMessage', 'chat.update'):
+            body = {"ok": True, "channel": arguments.get('channel'), "ts": arguments.get('ts') or ts}
+        else:
+            body = {"ok": True}
+
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+def start_fake_slack(latency=0.0, users=500):
+    """Serve the fake Web API on a free local port; returns the server.
+
+    Point the app at it with SLACK_API_URL=server.api_url.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeSlackHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.calls = Counter()
+    server.ts = 0
+    server.latency = latency
+    server.users = users
+    server.api_url = f"http://127.0.0.1:{server.server_address[1]}/api/"
+    threading.Thread(target=server.serve_forever, name="fake-slack", daemon=True).start()
+    return server
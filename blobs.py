@@ -0,0 +1,56 @@
+import zlib
+import hashlib
+
+from bson import Binary
+
+
+class BlobStore:
+    """Content-addressed, compressed storage for large text fields.
+
+    Each text is stored once under the SHA-256 of its content, so the same
+    version dump or stack trace pasted by many people costs a single
+    document. Slack inputs are capped at 3000 characters, far below the
+    16 MB document limit, which is why a plain collection is used rather
+    than GridFS.
+    """
+
+    def __init__(self, collection, level=6):
+        self.collection = collection
+        self.level = level
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def put(self, text):
+        """Store `text` if it is not stored yet and return its key (None for empty text)."""
+        if not text:
+            return None
+        key = self.key(text)
+        raw = text.encode('utf-8')
+        self.collection.update_one(
+            {"_id": key},
+            {"$setOnInsert": {
+                "data": Binary(zlib.compress(raw, self.level)),
+                "size": len(raw),
+            }},
+            upsert=True,
+        )
+        return key
+
+    def get(self, key):
+        """Return the text stored under `key`, or None if there is none."""
+        if not key:
+            return None
+        blob = self.collection.find_one({"_id": key})
+        if blob is None:
+            return None
+        return zlib.decompress(blob["data"]).decode('utf-8')
+
+    def get_many(self, keys):
+        """Return a {key: text} dict for the given keys in a single query."""
+        keys = [key for key in set(keys) if key]
+        if not keys:
+            return {}
+        return {blob["_id"]: zlib.decompress(blob["data"]).decode('utf-8')
+                for blob in self.collection.find({"_id": {"$in": keys}})}
@@ -0,0 +1,164 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a time-to-live.
+
+    Entries may be given their own ttl, e.g. a shorter one for negative
+    results. Hits, misses and evictions are counted for the stats endpoints.
+    """
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            return entry is not _MISSING and entry[1] > time.monotonic()
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class MongoCache:
+    """Cache shared by the worker processes, with the get/set interface of TTLCache.
+
+    Entries are documents keyed by the cache key; a TTL index removes them
+    once expired. Size is bounded by the ttl rather than by an entry count.
+    """
+
+    def __init__(self, collection, ttl=3600):
+        self.collection = collection
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def ensure_indexes(self):
+        try:
+            self.collection.create_index("expires_at", expireAfterSeconds=0, name="expires_at_ttl")
+        except Exception as e:
+            # Not fatal: expired entries are ignored in get() anyway
+            logging.error(f"Error creating the cache TTL index: {e}")
+
+    def get(self, key, default=None):
+        entry = self.collection.find_one({"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}})
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+        return entry["value"]
+
+    def set(self, key, value, ttl=None):
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl if ttl is None else ttl)
+        self.collection.replace_one({"_id": key}, {"_id": key, "value": value, "expires_at": expires_at}, upsert=True)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into a single call.
+
+    The first caller runs the function; callers arriving while it runs wait
+    for it and get the same result, or the same exception.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key, func):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.shared += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = func()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
@@ -0,0 +1,183 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+
+
+class InvalidInstructions(ValueError):
+    pass
+
+
+def natural_key(text):
+    """Sort key putting instructions_2.json before instructions_10.json."""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', text)]
+
+
+def validate_instructions(content, filename):
+    """Check an instruction file and return its (name, blocks)."""
+    if not isinstance(content, dict):
+        raise InvalidInstructions(f"{filename}: expected a JSON object")
+    name = content.get('name')
+    blocks = content.get('content')
+    if not isinstance(name, str) or not name.strip():
+        raise InvalidInstructions(f"{filename}: 'name' must be a non-empty string")
+    if len(name) > 75:
+        # Slack rejects option texts and values longer than 75 characters
+        raise InvalidInstructions(f"{filename}: 'name' is longer than 75 characters")
+    if not isinstance(blocks, list) or not all(isinstance(block, dict) and 'type' in block for block in blocks):
+        raise InvalidInstructions(f"{filename}: 'content' must be a list of Slack blocks")
+    return name, blocks
+
+
+class CatalogEntry:
+    def __init__(self, name, path, digest, blocks, view):
+        self.name = name
+        self.path = path
+        self.digest = digest
+        self.blocks = blocks
+        self.view = view
+        # Serialized once so that every modal update can send it as is
+        self.view_json = json.dumps(view)
+
+
+class InstructionCatalog:
+    """Instruction files of the `instructions/` directory, validated and ready to send.
+
+    `build_view(name, blocks)` turns the blocks of one file into the modal
+    view shown for that issue type; it runs once per file version. The
+    directory is polled in a background thread and only files whose
+    mtime/size and then content hash changed are parsed again. Nothing is
+    read until the catalog is first used.
+    """
+
+    def __init__(self, directory, build_view, poll_interval=5):
+        self.directory = directory
+        self.build_view = build_view
+        self.poll_interval = poll_interval
+        self.version = 0
+        self._entries = {}  # issue name -> CatalogEntry
+        self._files = {}  # path -> (mtime, size, digest, name)
+        self._lock = threading.Lock()
+        self._watcher_pid = None
+        self._loaded = False
+
+    def _scan(self):
+        files = {}
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith('.json'):
+                stat = entry.stat()
+                files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def reload(self):
+        """Pick up added, changed and removed files. Returns True if anything changed."""
+        with self._lock:
+            try:
+                current = self._scan()
+            except OSError as e:
+                logging.error(f"Error listing {self.directory}: {e}")
+                return False
+
+            files = {}
+            entries = dict(self._entries)
+            changed = False
+            names_by_path = {path: known[3] for path, known in self._files.items()}
+
+            for path, (mtime, size) in current.items():
+                known = self._files.get(path)
+                if known and known[:2] == (mtime, size):
+                    files[path] = known
+                    continue
+                try:
+                    with open(path, 'rb') as file:
+                        raw = file.read()
+                except (FileNotFoundError, PermissionError) as e:
+                    logging.error(f"Error reading {path}: {e}")
+                    continue
+                digest = hashlib.sha1(raw).hexdigest()
+                if known and known[2] == digest:
+                    files[path] = (mtime, size, digest, known[3])
+                    continue
+                try:
+                    name, blocks = validate_instructions(json.loads(raw), path)
+                except (json.JSONDecodeError, UnicodeDecodeError, InvalidInstructions) as e:
+                    # Keep serving the last good version of a broken file, and
+                    # remember its stat so it is not parsed again until edited
+                    logging.error(f"Error reading {path}: {e}")
+                    files[path] = (mtime, size, digest, known[3] if known else None)
+                    continue
+                old_name = names_by_path.get(path)
+                if old_name is not None and old_name != name:
+                    entries.pop(old_name, None)
+                entries[name] = CatalogEntry(name, path, digest, blocks, self.build_view(name, blocks))
+                files[path] = (mtime, size, digest, name)
+                changed = True
+
+            for path in set(self._files) - set(current):
+                name = names_by_path[path]
+                if name is not None and name in entries and entries[name].path == path:
+                    del entries[name]
+                changed = True
+
+            self._files = files
+            self._loaded = True
+            if changed:
+                ordered = sorted(entries.values(), key=lambda e: natural_key(os.path.basename(e.path)))
+                self._entries = {entry.name: entry for entry in ordered}
+                self.version += 1
+                logging.info(f"Loaded {len(self._entries)} instruction files (catalog version {self.version})")
+            return changed
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.reload()
+            except Exception as e:
+                logging.error(f"Error reloading instructions: {e}")
+
+    def ensure_loaded(self):
+        """Read the instruction files if that has not happened yet."""
+        if not self._loaded:
+            self.reload()
+
+    def ensure_watcher(self):
+        """Start the polling thread in the current process if it is not running."""
+        self.ensure_loaded()
+        if self.poll_interval <= 0 or self._watcher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._watcher_pid == os.getpid():
+                return
+            threading.Thread(target=self._watch, name="instruction-watcher", daemon=True).start()
+            self._watcher_pid = os.getpid()
+
+    def get(self, name):
+        self.ensure_loaded()
+        return self._entries.get(name)
+
+    def names(self):
+        self.ensure_loaded()
+        return list(self._entries)
+
+    def __len__(self):
+        self.ensure_loaded()
+        return len(self._entries)
+
+    def search(self, query, limit=100):
+        """Issue names containing `query` (case-insensitive), prefix matches first."""
+        self.ensure_loaded()
+        query = (query or '').strip().lower()
+        if not query:
+            return self.names()[:limit]
+        prefix, contains = [], []
+        for name in self._entries:
+            lowered = name.lower()
+            if lowered.startswith(query):
+                prefix.append(name)
+            elif query in lowered:
+                contains.append(name)
+        return (prefix + contains)[:limit]
@@ -0,0 +1,194 @@
+import os
+import json
+import queue
+import logging
+import threading
+from collections import deque
+
+from pymongo import CursorType, DESCENDING, ReturnDocument
+
+
+class Event:
+    def __init__(self, event_id, event_type, data):
+        self.id = str(event_id)
+        self.type = event_type
+        self.data = data
+
+    def to_sse(self):
+        """Format the event for a text/event-stream response."""
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data, default=str)}\n\n"
+
+
+class Subscription:
+    def __init__(self, bus, maxsize):
+        self.bus = bus
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def get(self, timeout):
+        """Next event, or None if nothing arrived within `timeout` seconds."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class InProcessEventBus:
+    """Publish/subscribe bus for dashboard updates within one process.
+
+    Recent events are kept in a ring buffer so that a reconnecting client
+    sending its Last-Event-ID gets what it missed. Only suitable when a
+    single worker process serves both the Slack routes and the dashboard.
+    """
+
+    def __init__(self, history=500, subscriber_queue_size=100):
+        self.subscriber_queue_size = subscriber_queue_size
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    def publish(self, event_type, data):
+        with self._lock:
+            event = Event(self._next_id, event_type, data)
+            self._next_id += 1
+        self._deliver(event)
+        return event
+
+    def _deliver(self, event):
+        with self._lock:
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                # A stalled client loses events rather than holding memory;
+                # it can resync with a full reload.
+                logging.warning("Dropping dashboard event for a slow subscriber")
+
+    def _missed_events(self, last_event_id):
+        try:
+            last = int(last_event_id)
+        except ValueError:
+            return []
+        with self._lock:
+            return [event for event in self._history if int(event.id) > last]
+
+    def subscribe(self, last_event_id=None):
+        """Register a subscriber, returning it with the events it missed."""
+        subscription = Subscription(self, self.subscriber_queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        missed = self._missed_events(last_event_id) if last_event_id else []
+        return subscription, missed
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+class MongoEventBus(InProcessEventBus):
+    """Event bus shared by several worker processes through a capped collection.
+
+    Events are inserted into a capped MongoDB collection and each process
+    tails it with one tailable cursor, fanning the events out to its own
+    subscribers. Unlike change streams this also works on a standalone
+    mongod, e.g. a local one used for development.
+
+    Event ids are sequence numbers taken from a counter document. Two
+    workers may insert their events in the opposite order of their
+    numbers, so the tail follows the collection's natural order and
+    remembers which recent numbers it delivered instead of resuming after
+    the highest one.
+    """
+
+    def __init__(self, database, collection_name="jarvisevents", size=8 * 1024 * 1024,
+                 counters_name="jarviscounters", window=1000, **kwargs):
+        super().__init__(**kwargs)
+        self.database = database
+        self.size = size
+        self.collection = database[collection_name]
+        self.counters = database[counters_name]
+        self.window = window
+        self._tail_pid = None
+        self._created = False
+
+    def _ensure_collection(self):
+        # Created on first use rather than on construction, so that building
+        # the bus does not need a connection to MongoDB
+        if self._created:
+            return
+        if self.collection.name not in self.database.list_collection_names():
+            try:
+                self.database.create_collection(self.collection.name, capped=True, size=self.size)
+            except Exception as e:
+                # Another worker may have created it in the meantime
+                logging.debug(f"Could not create events collection: {e}")
+        try:
+            self.collection.create_index("seq", name="seq")
+        except Exception as e:
+            logging.error(f"Error creating the events index: {e}")
+        self._created = True
+
+    def _next_seq(self):
+        counter = self.counters.find_one_and_update(
+            {"_id": self.collection.name}, {"$inc": {"seq": 1}}, upsert=True, return_document=ReturnDocument.AFTER)
+        return counter["seq"]
+
+    def publish(self, event_type, data):
+        self._ensure_collection()
+        seq = self._next_seq()
+        self.collection.insert_one({"seq": seq, "type": event_type, "data": data})
+        self._ensure_tailing()
+        return Event(seq, event_type, data)
+
+    def _ensure_tailing(self):
+        if self._tail_pid == os.getpid():
+            return
+        with self._lock:
+            if self._tail_pid == os.getpid():
+                return
+            threading.Thread(target=self._tail, name="event-tail", daemon=True).start()
+            self._tail_pid = os.getpid()
+
+    def _tail(self):
+        # Events numbered up to `floor` count as delivered, and so do the
+        # numbers in `delivered`; anything else met in the collection is new
+        newest = self.collection.find_one({"seq": {"$exists": True}}, sort=[("seq", DESCENDING)])
+        floor = newest["seq"] if newest else 0
+        delivered = set()
+        while True:
+            try:
+                cursor = self.collection.find({"seq": {"$gt": floor}}, cursor_type=CursorType.TAILABLE_AWAIT)
+                for document in cursor:
+                    seq = document["seq"]
+                    if seq <= floor or seq in delivered:
+                        continue
+                    delivered.add(seq)
+                    self._deliver(Event(seq, document["type"], document["data"]))
+                    if len(delivered) > 2 * self.window:
+                        floor = max(delivered) - self.window
+                        delivered = {seq for seq in delivered if seq > floor}
+            except Exception as e:
+                logging.error(f"Error tailing dashboard events: {e}")
+            threading.Event().wait(1)
+
+    def _missed_events(self, last_event_id):
+        try:
+            last = int(last_event_id)
+        except ValueError:
+            return []
+        return [Event(document["seq"], document["type"], document["data"])
+                for document in self.collection.find({"seq": {"$gt": last}}).sort("seq", 1)]
+
+    def subscribe(self, last_event_id=None):
+        self._ensure_collection()
+        self._ensure_tailing()
+        return super().subscribe(last_event_id)
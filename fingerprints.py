@@ -0,0 +1,164 @@
+import re
+import zlib
+import random
+import hashlib
+from datetime import datetime, timezone
+
+from pymongo import DESCENDING
+from pymongo.errors import DuplicateKeyError
+
+# A traceback frame: File "/path/to/strax/storage/files.py", line 123, in _read
+FRAME_RE = re.compile(r'File "(?:[^"]*[/\\])?([^"/\\]+)", line \d+, in (\S+)')
+PATH_RE = re.compile(r'(?:[A-Za-z]:)?(?:[\w.~-]*[/\\])+([\w.-]+)')
+HEX_RE = re.compile(r'0x[0-9a-fA-F]+')
+NUMBER_RE = re.compile(r'\d+')
+
+SHINGLE_SIZE = 4
+NUM_PERMUTATIONS = 64
+BANDS = 16  # of NUM_PERMUTATIONS // BANDS rows: candidates from a similarity of about 0.5
+MIN_SHINGLES = 3
+_PRIME = (1 << 61) - 1
+# Fixed seed: signatures must be comparable across processes and restarts
+_rng = random.Random(20240601)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+
+def normalize_log(text):
+    """Reduce a pasted log to the lines identifying the failure.
+
+    Frames become `frame file:function`; other lines lose their paths,
+    numbers and hex addresses, so the same error raised on another
+    machine, run or chunk normalizes to the same lines.
+    """
+    lines = []
+    for line in (text or "").splitlines():
+        frame = FRAME_RE.search(line)
+        if frame:
+            lines.append(f"frame {frame.group(1)}:{frame.group(2)}")
+            continue
+        line = PATH_RE.sub(r"\1", line)
+        line = HEX_RE.sub("0x", line)
+        line = NUMBER_RE.sub("0", line)
+        line = " ".join(line.split()).lower()
+        # Skip blank lines and the ^^^^ markers under the failing expression
+        if line.strip("^~ "):
+            lines.append(line)
+    return lines
+
+
+def shingles(lines, size=SHINGLE_SIZE):
+    """32-bit hashes of the runs of `size` consecutive words."""
+    words = " ".join(lines).split()
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode())} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + size]).encode()) for i in range(len(words) - size + 1)}
+
+
+class LogFingerprint:
+    """MinHash signature of a normalized log and its LSH band keys."""
+
+    def __init__(self, lines, hashes):
+        self.digest = hashlib.sha1("\n".join(lines).encode()).hexdigest()
+        self.signature = [min((a * x + b) % _PRIME for x in hashes) for a, b in _PERMUTATIONS]
+        rows = NUM_PERMUTATIONS // BANDS
+        self.bands = [
+            f"{band}:" + hashlib.blake2b(repr(self.signature[band * rows:(band + 1) * rows]).encode(), digest_size=8).hexdigest()
+            for band in range(BANDS)
+        ]
+
+    def similarity(self, signature):
+        """Estimated Jaccard similarity with another signature."""
+        return sum(a == b for a, b in zip(self.signature, signature)) / NUM_PERMUTATIONS
+
+
+def fingerprint_log(text):
+    """The fingerprint of a log, or None if it is too short to tell errors apart."""
+    lines = normalize_log(text)
+    hashes = shingles(lines)
+    if len(hashes) < MIN_SHINGLES:
+        return None
+    return LogFingerprint(lines, hashes)
+
+
+def log_headline(text, limit=200):
+    """The last line of a log that is not part of a frame, usually the exception."""
+    for line in reversed((text or "").splitlines()):
+        line = line.strip()
+        if line and not FRAME_RE.search(line) and line.strip("^~ "):
+            return line[:limit]
+    return ""
+
+
+class IssueClusters:
+    """Groups issues whose error logs are near duplicates.
+
+    Each cluster document keeps the signature of its first log and the band
+    keys of that signature in a multikey index. A new log is compared only
+    with the clusters sharing at least one band, one indexed query, and
+    joins the most similar one above `threshold`. A cluster also remembers
+    the Slack message its later reports are threaded under.
+    """
+
+    def __init__(self, collection, threshold=0.6, max_candidates=50):
+        self.collection = collection
+        self.threshold = threshold
+        self.max_candidates = max_candidates
+
+    def ensure_indexes(self):
+        self.collection.create_index("bands", name="bands")
+        self.collection.create_index([("count", DESCENDING), ("last_seen", DESCENDING)], name="count_last_seen")
+        self.collection.create_index([("last_seen", DESCENDING)], name="last_seen")
+
+    def match(self, fingerprint):
+        """Return (cluster id, similarity) of the closest cluster, or (None, 0)."""
+        best = (None, 0.0)
+        candidates = self.collection.find({"bands": {"$in": fingerprint.bands}}, {"signature": True}).limit(self.max_candidates)
+        for candidate in candidates:
+            similarity = fingerprint.similarity(candidate["signature"])
+            if similarity > best[1]:
+                best = (candidate["_id"], similarity)
+        return best if best[1] >= self.threshold else (None, 0.0)
+
+    def assign(self, fingerprint, headline, issue_type, now=None):
+        """Count a new issue in its cluster, creating the cluster if needed; returns its id."""
+        now = now or datetime.now(timezone.utc)
+        cluster_id, _ = self.match(fingerprint)
+        if cluster_id is None:
+            try:
+                # Keyed by the exact normalized log, so two identical reports
+                # arriving together still end up in one cluster
+                self.collection.insert_one({
+                    "_id": fingerprint.digest,
+                    "signature": fingerprint.signature,
+                    "bands": fingerprint.bands,
+                    "headline": headline,
+                    "issue_type": issue_type,
+                    "count": 1,
+                    "first_seen": now,
+                    "last_seen": now,
+                })
+                return fingerprint.digest
+            except DuplicateKeyError:
+                cluster_id = fingerprint.digest
+        self.collection.update_one({"_id": cluster_id}, {"$inc": {"count": 1}, "$max": {"last_seen": now}})
+        return cluster_id
+
+    def thread(self, cluster_id):
+        """The Slack message {issue_id, channel, ts} reports of the cluster are threaded under, if any."""
+        cluster = self.collection.find_one({"_id": cluster_id}, {"thread": True})
+        return cluster.get("thread") if cluster else None
+
+    def set_thread(self, cluster_id, issue_id, channel, ts):
+        self.collection.update_one({"_id": cluster_id}, {"$set": {"thread": {"issue_id": issue_id, "channel": channel, "ts": ts}}})
+
+    def page(self, sort, skip, limit):
+        """Clusters for the grouped dashboard view, most reported or most recent first."""
+        order = [("count", DESCENDING), ("last_seen", DESCENDING)] if sort == "count" else [("last_seen", DESCENDING)]
+        projection = {"headline": True, "issue_type": True, "count": True, "first_seen": True, "last_seen": True}
+        return list(self.collection.find({}, projection).sort(order).skip(skip).limit(limit))
+
+    def recount(self, counts):
+        """Replace the stored issue counts by `counts`, {cluster id: count}; drop empty clusters."""
+        for cluster_id, count in counts.items():
+            self.collection.update_one({"_id": cluster_id}, {"$set": {"count": count}})
+        self.collection.delete_many({"_id": {"$nin": list(counts)}})
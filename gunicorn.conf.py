@@ -0,0 +1,46 @@
+# Production settings: gunicorn -c gunicorn.conf.py 'app:create_app()'
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+
+# Worker processes scale across cores; the threads of each worker serve the
+# long-lived /events streams and overlap requests waiting on MongoDB or Slack.
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+threads = int(os.getenv("WEB_THREADS", "8"))
+worker_class = "gthread"
+
+# Backends that default to per-process memory would give every worker its own
+# events, redelivery log and cache. With several workers they default to the
+# MongoDB ones instead; the app reads its configuration after this file.
+SHARED_BACKENDS = ("EVENT_BUS", "IDEMPOTENCY_STORE", "RESPONSE_CACHE")
+if workers > 1:
+    for name in SHARED_BACKENDS:
+        os.environ.setdefault(name, "mongo")
+timeout = int(os.getenv("WEB_TIMEOUT", "30"))
+graceful_timeout = 30
+keepalive = 5
+
+# The app is imported once in the master and forked into the workers. It
+# opens no connections on import, so this only saves start-up time and memory.
+preload_app = True
+
+accesslog = "-"
+
+
+def when_ready(server):
+    if workers > 1:
+        for name in SHARED_BACKENDS:
+            if os.environ[name] == "memory":
+                server.log.warning(f"{name}=memory with {workers} workers: each worker keeps its own, "
+                                   f"set {name}=mongo to share it between them")
+
+
+def post_fork(server, worker):
+    from app import start_worker
+    start_worker()
+
+
+def worker_exit(server, worker):
+    from app import job_queue
+    job_queue.stop()
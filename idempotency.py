@@ -0,0 +1,64 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from pymongo.errors import DuplicateKeyError
+
+from cache import TTLCache
+
+
+class MemoryIdempotencyStore:
+    """Remembers recently handled deliveries within one worker process."""
+
+    def __init__(self, ttl=3600, maxsize=10000):
+        self._seen = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def claim(self, key, result):
+        """Record `result` for `key` and return None, or return the result
+        recorded by an earlier delivery of the same key."""
+        with self._lock:
+            previous = self._seen.get(key)
+            if previous is not None:
+                return previous
+            self._seen.set(key, result)
+            return None
+
+
+class MongoIdempotencyStore:
+    """Remembers handled deliveries across worker processes.
+
+    The delivery key is the document _id, so of two workers receiving the
+    same payload only one can insert it. A TTL index expires old keys.
+    """
+
+    def __init__(self, collection, ttl=3600):
+        self.collection = collection
+        self.ttl = ttl
+
+    def ensure_indexes(self):
+        try:
+            self.collection.create_index("expires_at", expireAfterSeconds=0, name="expires_at_ttl")
+        except Exception as e:
+            # Not fatal: expired keys are ignored in claim() anyway
+            logging.error(f"Error creating the idempotency TTL index: {e}")
+
+    def claim(self, key, result):
+        """Record `result` for `key` and return None, or return the result
+        recorded by an earlier delivery of the same key."""
+        now = datetime.now(timezone.utc)
+        try:
+            self.collection.insert_one({"_id": key, "result": result, "expires_at": now + timedelta(seconds=self.ttl)})
+            return None
+        except DuplicateKeyError:
+            previous = self.collection.find_one({"_id": key})
+            if previous is None:
+                return self.claim(key, result)
+            expires_at = previous["expires_at"]
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if expires_at <= now:
+                # The TTL monitor only runs once a minute
+                self.collection.delete_one({"_id": key, "expires_at": previous["expires_at"]})
+                return self.claim(key, result)
+            return previous["result"]
@@ -0,0 +1,159 @@
+import os
+import time
+import queue
+import logging
+import threading
+from collections import deque
+
+
+def percentile(values, pct):
+    """Return the pct-th percentile of a list of numbers (nearest rank)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Job:
+    def __init__(self, func, args, kwargs, name):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.name = name or getattr(func, '__name__', 'job')
+        self.attempts = 0
+        self.enqueued_at = time.monotonic()
+
+
+class JobQueue:
+    """In-process job queue drained by a pool of worker threads.
+
+    Jobs are plain callables. A job that raises is retried with exponential
+    backoff up to `max_retries` times before it is dropped and logged. With
+    `workers=0` jobs run inline in the calling thread, which is what you want
+    for local debugging. `observe(name, seconds, failed)`, if given, is
+    called after every attempt.
+    """
+
+    def __init__(self, workers=4, max_retries=3, retry_delay=0.5, maxsize=0, history=1000, observe=None):
+        self.workers = workers
+        self.observe = observe
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=history)
+        self._waits = deque(maxlen=history)
+        self._counters = {"submitted": 0, "completed": 0, "retried": 0, "failed": 0}
+        self._running = 0
+
+    def _ensure_started(self):
+        # Threads do not survive a fork, so (re)start the pool in whichever
+        # process first submits a job.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._threads = []
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            self._pid = os.getpid()
+
+    def submit(self, func, *args, name=None, **kwargs):
+        """Queue `func(*args, **kwargs)` and return immediately."""
+        job = Job(func, args, kwargs, name)
+        with self._lock:
+            self._counters["submitted"] += 1
+        if self.workers <= 0:
+            self._run(job)
+            return job
+        self._ensure_started()
+        self._queue.put(job)
+        return job
+
+    def _requeue(self, job):
+        self._queue.put(job)
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+            try:
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job):
+        job.attempts += 1
+        started = time.monotonic()
+        with self._lock:
+            self._running += 1
+            if job.attempts == 1:
+                self._waits.append(started - job.enqueued_at)
+        failed = False
+        try:
+            job.func(*job.args, **job.kwargs)
+        except Exception as e:
+            failed = True
+            if job.attempts <= self.max_retries and self.workers > 0:
+                delay = self.retry_delay * (2 ** (job.attempts - 1))
+                logging.warning(f"Job {job.name} failed (attempt {job.attempts}), retrying in {delay:.1f}s: {e}")
+                with self._lock:
+                    self._counters["retried"] += 1
+                timer = threading.Timer(delay, self._requeue, args=(job,))
+                timer.daemon = True
+                timer.start()
+            else:
+                logging.error(f"Job {job.name} failed after {job.attempts} attempt(s): {e}")
+                with self._lock:
+                    self._counters["failed"] += 1
+        else:
+            with self._lock:
+                self._counters["completed"] += 1
+                self._latencies.append(time.monotonic() - job.enqueued_at)
+        finally:
+            with self._lock:
+                self._running -= 1
+            if self.observe is not None:
+                self.observe(job.name, time.monotonic() - started, failed)
+
+    def join(self):
+        """Block until every queued job has been processed."""
+        self._queue.join()
+
+    def stop(self):
+        """Ask the workers to exit once the queue is drained."""
+        if self._pid != os.getpid():
+            return
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._pid = None
+
+    def stats(self):
+        with self._lock:
+            latencies = list(self._latencies)
+            waits = list(self._waits)
+            stats = dict(self._counters)
+            stats["running"] = self._running
+        stats["workers"] = self.workers
+        stats["queue_depth"] = self._queue.qsize()
+        stats["latency_ms"] = {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "max": round(max(latencies, default=0.0) * 1000, 2),
+        }
+        stats["wait_ms"] = {
+            "p50": round(percentile(waits, 50) * 1000, 2),
+            "p95": round(percentile(waits, 95) * 1000, 2),
+        }
+        return stats
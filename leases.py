@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta, timezone
+
+from pymongo.errors import DuplicateKeyError
+
+
+class Lease:
+    """A named lease document letting one process at a time do some work.
+
+    The lease expires `seconds` after it was taken or last renewed, so a
+    process that dies while holding it only blocks the others until then.
+    """
+
+    def __init__(self, collection, name, seconds):
+        self.collection = collection
+        self.name = name
+        self.seconds = seconds
+
+    def _expires_at(self):
+        return datetime.now(timezone.utc) + timedelta(seconds=self.seconds)
+
+    def acquire(self, owner=None):
+        """Take the lease for `owner` unless someone else holds it. Returns whether it was taken."""
+        now = datetime.now(timezone.utc)
+        try:
+            # Matches an expired lease or, through the upsert, no lease at all
+            self.collection.update_one(
+                {"_id": self.name, "expires_at": {"$not": {"$gt": now}}},
+                {"$set": {"expires_at": self._expires_at(), "owner": owner}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def renew(self, owner):
+        """Extend the lease held by `owner`. Returns False if it passed to someone else."""
+        return self.collection.update_one(
+            {"_id": self.name, "owner": owner},
+            {"$set": {"expires_at": self._expires_at()}},
+        ).matched_count == 1
+
+    def release(self, owner):
+        self.collection.delete_one({"_id": self.name, "owner": owner})
@@ -0,0 +1,132 @@
+import threading
+from bisect import bisect_left
+
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_labels(labelnames, labels, extra=()):
+    pairs = list(zip(labelnames, labels)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    def __init__(self, registry, name, documentation, labelnames):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, registry, name, documentation, labelnames, buckets=DEFAULT_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        if not self.registry.enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{format_labels(self.labelnames, labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{self.name}_bucket{format_labels(self.labelnames, labels, [('le', '+Inf')])} {series[-1]}")
+                lines.append(f"{self.name}_sum{format_labels(self.labelnames, labels)} {series[-2]}")
+                lines.append(f"{self.name}_count{format_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    """Minimal Prometheus registry: counters, histograms and scrape-time gauges.
+
+    When disabled, recording is a single attribute check so the
+    instrumentation can stay in place at almost no cost.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._metrics = []
+        self._gauges = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(self, name, documentation, tuple(labelnames))
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(self, name, documentation, tuple(labelnames), buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, documentation, labelnames, collect):
+        """Register a gauge whose samples, {labels tuple: value}, are read at scrape time."""
+        self._gauges.append((name, documentation, tuple(labelnames), collect))
+
+    def render(self):
+        """The registry in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, documentation, labelnames, collect in self._gauges:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in sorted(collect().items()):
+                lines.append(f"{name}{format_labels(labelnames, labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """Times every MongoDB command through pymongo's command monitoring.
+
+    `observe(command_name, seconds, failed)` is called when a command ends.
+    """
+
+    def __init__(self, observe):
+        self.observe = observe
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.observe(event.command_name, event.duration_micros / 1e6, False)
+
+    def failed(self, event):
+        self.observe(event.command_name, event.duration_micros / 1e6, True)
@@ -0,0 +1,233 @@
+import logging
+from datetime import timedelta
+
+from bson import ObjectId
+from pymongo import ASCENDING, ReplaceOne, UpdateOne
+
+from leases import Lease
+
+GRANULARITIES = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+# Upper bounds, in hours, of the time-to-resolution histogram buckets
+RESOLUTION_BOUNDS = (1, 4, 12, 24, 72, 168, 720)
+
+
+def bucket_start(moment, granularity):
+    """Start of the hour or day (UTC) containing `moment`."""
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def resolution_bucket(seconds):
+    hours = seconds / 3600
+    for bound in RESOLUTION_BOUNDS:
+        if hours <= bound:
+            return str(bound)
+    return "inf"
+
+
+class RollupBatch:
+    """Rollup increments gathered in memory and written in one bulk write."""
+
+    def __init__(self, store):
+        self.store = store
+        self._increments = {}  # (granularity, bucket, issue_type) -> {field: amount}
+        self._maxima = {}
+
+    def _add(self, moment, issue_type, increments, maxima=None):
+        for granularity in GRANULARITIES:
+            key = (granularity, bucket_start(moment, granularity), issue_type)
+            counters = self._increments.setdefault(key, {})
+            for field, amount in increments.items():
+                counters[field] = counters.get(field, 0) + amount
+            for field, value in (maxima or {}).items():
+                self._maxima.setdefault(key, {})[field] = max(value, self._maxima.get(key, {}).get(field, value))
+
+    def submitted(self, issue_type, submitted_at):
+        self._add(submitted_at, issue_type, {"submitted": 1})
+
+    def status_changed(self, issue_type, new_status, changed_at, submitted_at=None):
+        """Count a status change; a resolution also adds its time to resolution."""
+        increments = {f"status.{new_status}": 1}
+        maxima = None
+        if new_status == "resolved" and submitted_at is not None:
+            seconds = max((changed_at - submitted_at).total_seconds(), 0)
+            increments.update({
+                "resolution.count": 1,
+                "resolution.seconds": seconds,
+                f"resolution.histogram.{resolution_bucket(seconds)}": 1,
+            })
+            maxima = {"resolution.max_seconds": seconds}
+        self._add(changed_at, issue_type, increments, maxima)
+
+    def write(self):
+        if not self._increments:
+            return
+        operations = []
+        for key, increments in self._increments.items():
+            granularity, bucket, issue_type = key
+            update = {
+                "$inc": increments,
+                "$setOnInsert": {"granularity": granularity, "bucket": bucket, "issue_type": issue_type},
+                # Counted live since the last rebuild, so never a leftover of it
+                "$unset": {"rebuild": ""},
+            }
+            if key in self._maxima:
+                update["$max"] = self._maxima[key]
+            operations.append(UpdateOne({"_id": self.store.rollup_id(*key)}, update, upsert=True))
+        self.store.collection.bulk_write(operations, ordered=False)
+        self._increments = {}
+        self._maxima = {}
+
+
+class RollupStore:
+    """Hourly and daily issue counters per issue type, for the analytics page.
+
+    Every bucket document counts the issues submitted in it, the status
+    changes made in it and the time to resolution of the issues resolved
+    in it. Reading a time range costs one document per bucket and issue
+    type, whatever the number of issues.
+    """
+
+    def __init__(self, collection, leases=None, lease_seconds=600):
+        self.collection = collection
+        self.lease = Lease(leases, "rollups", lease_seconds) if leases is not None else None
+
+    @staticmethod
+    def rollup_id(granularity, bucket, issue_type):
+        return f"{granularity}:{bucket:%Y-%m-%dT%H}:{issue_type}"
+
+    def ensure_indexes(self):
+        self.collection.create_index([("granularity", ASCENDING), ("bucket", ASCENDING)], name="granularity_bucket")
+
+    def batch(self):
+        return RollupBatch(self)
+
+    def submitted(self, issue_type, submitted_at):
+        batch = self.batch()
+        batch.submitted(issue_type, submitted_at)
+        batch.write()
+
+    def status_changed(self, issue_type, new_status, changed_at, submitted_at=None):
+        batch = self.batch()
+        batch.status_changed(issue_type, new_status, changed_at, submitted_at)
+        batch.write()
+
+    def find(self, granularity, since, until, issue_type=None):
+        query = {"granularity": granularity, "bucket": {"$gte": bucket_start(since, granularity), "$lte": until}}
+        if issue_type:
+            query["issue_type"] = issue_type
+        return self.collection.find(query)
+
+    def _renew_lease(self, owner):
+        if self.lease is None or self.lease.renew(owner):
+            return True
+        logging.warning("Lost the rollups lease, abandoning the rebuild")
+        return False
+
+    def rebuild(self, issues):
+        """Recompute every bucket from `issues`, an iterable of issue documents
+        with issue_type, submitted_at, status and resolved_at. Returns the
+        number of buckets written, or None if another process is rebuilding.
+        The lease is renewed as the rebuild goes; if it was lost, e.g. after
+        a stall longer than the lease, the rebuild stops before deleting.
+
+        Past status changes are not stored on the issues, so the rebuilt
+        buckets count the current resolution of each issue and no reopenings.
+        """
+        rebuild = ObjectId()
+        if self.lease is not None and not self.lease.acquire(rebuild):
+            return None
+        try:
+            return self._rebuild(issues, rebuild)
+        finally:
+            if self.lease is not None:
+                self.lease.release(rebuild)
+
+    def _rebuild(self, issues, rebuild):
+        batch = self.batch()
+        for count, issue in enumerate(issues, 1):
+            if count % 10000 == 0 and not self._renew_lease(rebuild):
+                return None
+            batch.submitted(issue.get("issue_type"), issue["submitted_at"])
+            if issue.get("status") == "resolved" and issue.get("resolved_at"):
+                batch.status_changed(issue.get("issue_type"), "resolved", issue["resolved_at"], issue["submitted_at"])
+
+        documents = []
+        for key, increments in batch._increments.items():
+            granularity, bucket, issue_type = key
+            document = {"_id": self.rollup_id(*key), "granularity": granularity, "bucket": bucket,
+                        "issue_type": issue_type, "rebuild": rebuild}
+            for field, amount in {**increments, **batch._maxima.get(key, {})}.items():
+                target = document
+                *parents, name = field.split(".")
+                for parent in parents:
+                    target = target.setdefault(parent, {})
+                target[name] = amount
+            documents.append(document)
+
+        for start in range(0, len(documents), 1000):
+            if not self._renew_lease(rebuild):
+                return None
+            self.collection.bulk_write([ReplaceOne({"_id": document["_id"]}, document, upsert=True)
+                                        for document in documents[start:start + 1000]], ordered=False)
+        # Buckets of an earlier rebuild left over from issues that no longer
+        # exist. Buckets without the field were updated live and are kept.
+        if not self._renew_lease(rebuild):
+            return None
+        self.collection.delete_many({"rebuild": {"$exists": True, "$ne": rebuild}})
+        return len(documents)
+
+
+def summarize_rollups(documents, granularity, since, until):
+    """Merge bucket documents into a zero-filled time series plus totals per
+    issue type and time-to-resolution statistics."""
+    step = GRANULARITIES[granularity]
+    series = {}
+    bucket = bucket_start(since, granularity)
+    while bucket <= until:
+        series[bucket] = {"start": bucket, "submitted": 0, "resolved": 0, "reopened": 0}
+        bucket += step
+
+    issue_types = {}
+    resolution = {"count": 0, "seconds": 0.0, "max_seconds": 0.0}
+    histogram = dict.fromkeys([str(bound) for bound in RESOLUTION_BOUNDS] + ["inf"], 0)
+    for document in documents:
+        point = series.get(document["bucket"])
+        if point is None:
+            continue
+        status = document.get("status", {})
+        point["submitted"] += document.get("submitted", 0)
+        point["resolved"] += status.get("resolved", 0)
+        point["reopened"] += status.get("pending", 0)
+        issue_types[document["issue_type"]] = issue_types.get(document["issue_type"], 0) + document.get("submitted", 0)
+        stats = document.get("resolution", {})
+        resolution["count"] += stats.get("count", 0)
+        resolution["seconds"] += stats.get("seconds", 0)
+        resolution["max_seconds"] = max(resolution["max_seconds"], stats.get("max_seconds", 0))
+        for bound, count in stats.get("histogram", {}).items():
+            histogram[bound] = histogram.get(bound, 0) + count
+
+    def percentile_hours(pct):
+        # Upper bound of the histogram bucket holding the percentile
+        seen = 0
+        for bound, count in histogram.items():
+            seen += count
+            if count and seen >= pct / 100 * resolution["count"]:
+                return None if bound == "inf" else float(bound)
+        return None
+
+    return {
+        "granularity": granularity,
+        "series": list(series.values()),
+        "issue_types": issue_types,
+        "resolution": {
+            "count": resolution["count"],
+            "mean_hours": round(resolution["seconds"] / resolution["count"] / 3600, 2) if resolution["count"] else None,
+            "max_hours": round(resolution["max_seconds"] / 3600, 2) if resolution["count"] else None,
+            "p50_hours_at_most": percentile_hours(50),
+            "p90_hours_at_most": percentile_hours(90),
+            "histogram_hours": [{"at_most": None if bound == "inf" else float(bound), "count": count}
+                                for bound, count in histogram.items()],
+        },
+    }
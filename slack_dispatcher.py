@@ -0,0 +1,241 @@
+import time
+import logging
+import threading
+from collections import defaultdict
+
+import requests
+from requests.adapters import HTTPAdapter
+from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web import SlackResponse
+
+# Sustained calls per second and burst size for the Web API methods the bot
+# uses, following Slack's rate limit tiers (Tier 2: 20/min, Tier 3: 50/min,
+# Tier 4: 100/min, chat.postMessage: about 1 per second).
+DEFAULT_RATE_LIMITS = {
+    "chat.postMessage": (1.0, 3),
+    "chat.update": (50 / 60, 5),
+    "views.open": (100 / 60, 10),
+    "views.update": (100 / 60, 10),
+    "users.info": (100 / 60, 10),
+    "users.list": (20 / 60, 2),
+}
+FALLBACK_RATE_LIMIT = (50 / 60, 5)
+
+
+def retry_after(headers, default):
+    """Seconds of the Retry-After header, looked up case-insensitively, or `default`."""
+    for name, value in (headers or {}).items():
+        if name.lower() == "retry-after":
+            return float(value)
+    return default
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available. Returns the time waited."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds):
+        """Hand out no token for `seconds`, e.g. after Slack answered 429."""
+        with self.lock:
+            self.tokens = 1 - seconds * self.rate
+            self.updated_at = time.monotonic()
+
+
+class PooledWebClient(WebClient):
+    """WebClient whose calls go through a requests.Session.
+
+    slack_sdk's own transport opens a new urllib connection for every call.
+    Here the connections to Slack are kept alive in a pool shared by the
+    threads, so a call costs one round trip instead of a TCP and TLS
+    handshake first. File uploads and basic auth, which the bot does not
+    use, still go through the default transport.
+    """
+
+    def __init__(self, *args, pool_size=10, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def api_call(self, api_method, *, http_verb="POST", files=None, data=None, params=None, json=None, headers=None, auth=None):
+        if files is not None or auth is not None:
+            return super().api_call(api_method, http_verb=http_verb, files=files, data=data, params=params,
+                                    json=json, headers=headers, auth=auth)
+        api_url = f"{self.base_url}{api_method}"
+        request_headers = {**self.headers, **(headers or {})}
+        if self.token:
+            request_headers["Authorization"] = f"Bearer {self.token}"
+        if http_verb == "GET":
+            request = {"params": {**(params or {}), **(data or {})}}
+        elif json is not None:
+            request = {"json": json, "params": params}
+        else:
+            request = {"data": {**(params or {}), **(data or {})}}
+        response = self.session.request(http_verb, api_url, headers=request_headers, timeout=self.timeout, **request)
+        try:
+            body = response.json()
+        except ValueError:
+            body = response.content
+        return SlackResponse(
+            client=self,
+            http_verb=http_verb,
+            api_url=api_url,
+            req_args=request,
+            data=body,
+            headers=dict(response.headers),
+            status_code=response.status_code,
+        ).validate()
+
+
+class SlackDispatcher:
+    """Sends Web API calls through per-method token buckets.
+
+    With `throttle=False` the buckets are skipped (e.g. against a local fake
+    of the API) but 429 answers are still honoured. Calls answered with
+    HTTP 429 are retried after the Retry-After delay,
+    which also pauses the other calls to the same method. Message updates
+    for the same (channel, ts) sent through `update_message` are coalesced:
+    while one is waiting or in flight, newer ones only replace its content.
+    WebClient methods can be called on the dispatcher directly, e.g.
+    `dispatcher.chat_postMessage(channel=..., blocks=...)`.
+    `observe(method, seconds, failed)`, if given, is called after every
+    HTTP call to Slack.
+    """
+
+    def __init__(self, client, rate_limits=None, max_retries=3, throttle=True, observe=None):
+        self.client = client
+        self.observe = observe
+        self.max_retries = max_retries
+        self.throttle = throttle
+        self.rate_limits = {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._pending_updates = {}
+        self._sending_updates = set()
+        self._metrics = defaultdict(lambda: {
+            "calls": 0, "errors": 0, "rate_limited": 0, "retries": 0,
+            "throttled": 0, "throttle_wait_seconds": 0.0, "coalesced": 0,
+        })
+
+    def _bucket(self, method):
+        with self._lock:
+            if method not in self._buckets:
+                self._buckets[method] = TokenBucket(*self.rate_limits.get(method, FALLBACK_RATE_LIMIT))
+            return self._buckets[method]
+
+    def _count(self, method, key, amount=1):
+        with self._lock:
+            self._metrics[method][key] += amount
+
+    def _throttle(self, method):
+        if not self.throttle:
+            return
+        waited = self._bucket(method).acquire()
+        if waited:
+            self._count(method, "throttled")
+            self._count(method, "throttle_wait_seconds", waited)
+
+    def _send(self, method, func, **kwargs):
+        attempt = 0
+        while True:
+            self._count(method, "calls")
+            started = time.perf_counter()
+            try:
+                response = func(**kwargs)
+            except Exception as e:
+                if self.observe is not None:
+                    self.observe(method, time.perf_counter() - started, True)
+                if not isinstance(e, SlackApiError):
+                    self._count(method, "errors")
+                    raise
+                if e.response.status_code != 429 or attempt >= self.max_retries:
+                    self._count(method, "errors")
+                    raise
+                attempt += 1
+                delay = retry_after(e.response.headers, 2 ** attempt)
+                logging.warning(f"Slack rate limited {method}, retrying in {delay}s")
+                self._count(method, "rate_limited")
+                self._count(method, "retries")
+                if self.throttle:
+                    # Holds back the other calls to the method as well
+                    self._bucket(method).pause(delay)
+                    self._throttle(method)
+                else:
+                    time.sleep(delay)
+            else:
+                if self.observe is not None:
+                    self.observe(method, time.perf_counter() - started, False)
+                return response
+
+    def call(self, method, **kwargs):
+        """Call a Web API method within its rate limit; kwargs go to WebClient.api_call."""
+        self._throttle(method)
+        return self._send(method, self.client.api_call, api_method=method, **kwargs)
+
+    def __getattr__(self, name):
+        # dispatcher.chat_postMessage(...) wraps client.chat_postMessage(...)
+        func = getattr(self.client, name)
+        method = name.replace("_", ".", 1)
+
+        def throttled(**kwargs):
+            self._throttle(method)
+            return self._send(method, func, **kwargs)
+        return throttled
+
+    def update_message(self, channel, ts, **kwargs):
+        """chat.update that only sends the latest content queued for a message.
+
+        Returns the Slack response, or None if the update was merged into one
+        sent by another thread.
+        """
+        key = (channel, ts)
+        with self._lock:
+            self._pending_updates[key] = kwargs
+            if key in self._sending_updates:
+                self._metrics["chat.update"]["coalesced"] += 1
+                return None
+            self._sending_updates.add(key)
+
+        response = None
+        try:
+            while True:
+                with self._lock:
+                    if key not in self._pending_updates:
+                        self._sending_updates.discard(key)
+                        return response
+                self._throttle("chat.update")
+                # Whatever arrived while waiting for the bucket is merged here
+                with self._lock:
+                    latest = self._pending_updates.pop(key)
+                response = self._send("chat.update", self.client.chat_update, channel=channel, ts=ts, **latest)
+        except Exception:
+            with self._lock:
+                self._sending_updates.discard(key)
+            raise
+
+    def stats(self):
+        with self._lock:
+            return {method: {key: round(value, 3) if isinstance(value, float) else value
+                             for key, value in metrics.items()}
+                    for method, metrics in self._metrics.items()}
@@ -35,22 +35,36 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
-    function setupPagination(totalPages, currentPage) {
+    function setupPagination(currentPage, hasNextPage) {
         const paginationControls = document.getElementById('paginationControls');
         paginationControls.innerHTML = '';
 
-        for (let i = 1; i <= totalPages; i++) {
+        const pages = [
+            { label: '&laquo;', page: currentPage - 1, disabled: currentPage <= 1 },
+            { label: `${currentPage}`, page: currentPage, active: true },
+            { label: '&raquo;', page: currentPage + 1, disabled: !hasNextPage },
+        ];
+        pages.forEach(item => {
             const li = document.createElement('li');
-            li.className = i === currentPage ? 'page-item active' : 'page-item';
-            li.innerHTML = `<a class="page-link" href="#" data-page="${i}">${i}</a>`;
+            li.className = 'page-item' + (item.active ? ' active' : '') + (item.disabled ? ' disabled' : '');
+            li.innerHTML = item.disabled
+                ? `<span class="page-link">${item.label}</span>`
+                : `<a class="page-link" href="#" data-page="${item.page}">${item.label}</a>`;
             paginationControls.appendChild(li);
-        }
+        });
+    }
 
+    const paginationControls = document.getElementById('paginationControls');
+    if (paginationControls) {
         paginationControls.addEventListener('click', function(e) {
             e.preventDefault();
             if (e.target.tagName === 'A') {
                 const selectedPage = parseInt(e.target.getAttribute('data-page'));
-                fetchAndDisplayIssues(selectedPage);
+                if (groupDuplicates && groupDuplicates.checked) {
+                    fetchClusters(selectedPage);
+                } else {
+                    fetchAndDisplayIssues(selectedPage);
+                }
             }
         });
     }
@@ -83,11 +97,269 @@ document.addEventListener('DOMContentLoaded', function() {
             });
     }
 
+    function fetchIssueDetails(issueId) {
+        return fetch(`/issues/${issueId}`).then(response => {
+            if (!response.ok) {
+                throw new Error(`Server returned status: ${response.status}`);
+            }
+            return response.json();
+        });
+    }
+
+    // Timestamps come from the server in UTC and are shown in local time
+    function formatTimestamp(value) {
+        const date = new Date(value);
+        return isNaN(date) ? value : date.toLocaleString();
+    }
+
+    function statusBadge(status) {
+        let badgeClass = status === 'pending' ? 'badge-warning' : status === 'resolved' ? 'badge-success' : 'badge-danger';
+        return `<span class="badge ${badgeClass}">${status}</span>`;
+    }
+
+    function renderIssueRow(tbody, issue, index = -1) {
+        let newRow = tbody.insertRow(index);
+        newRow.dataset.id = issue._id;
+
+        let cell0 = newRow.insertCell(0);
+        const checkbox = document.createElement('input');
+        checkbox.type = 'checkbox';
+        checkbox.className = 'issue-select';
+        checkbox.value = issue._id;
+        cell0.appendChild(checkbox);
+
+        let cell1 = newRow.insertCell(1);
+        cell1.textContent = formatTimestamp(issue.submitted_at);
+
+        let cell2 = newRow.insertCell(2);
+        cell2.textContent = issue.user_id;
+
+        let cell3 = newRow.insertCell(3);
+        cell3.textContent = issue.issue_type;
+
+        let cell4 = newRow.insertCell(4);
+        cell4.textContent = issue.description;
+
+        let cell5 = newRow.insertCell(5);
+        cell5.textContent = issue.reproduce;
+
+        let cell6 = newRow.insertCell(6);
+        cell6.textContent = issue.log_preview;
+        if (issue.log_length > issue.log_preview.length) {
+            // Only a preview is listed, the full log is loaded on demand
+            cell6.textContent += '… ';
+            const more = document.createElement('a');
+            more.href = '#';
+            more.textContent = 'show full log';
+            more.addEventListener('click', function(e) {
+                e.preventDefault();
+                fetchIssueDetails(issue._id)
+                    .then(details => { cell6.textContent = details.log; })
+                    .catch(error => {
+                        console.error("Error fetching issue details:", error);
+                        displayError("Error fetching the issue details. Please try again.");
+                    });
+            });
+            cell6.appendChild(more);
+        }
+
+        let cell7 = newRow.insertCell(7);
+        cell7.innerHTML = statusBadge(issue.status);
+        return newRow;
+    }
+
+    const STATUS_CELL = 7;
+
+    // Bulk status changes of the selected rows
+    function selectedIssueIds() {
+        return Array.from(document.querySelectorAll('#issuesTable tbody .issue-select:checked')).map(box => box.value);
+    }
+
+    function updateBulkActions() {
+        const selected = selectedIssueIds().length;
+        const selectedCount = document.getElementById('selectedCount');
+        if (!selectedCount) {
+            return;
+        }
+        selectedCount.textContent = `${selected} selected`;
+        document.querySelectorAll('#bulkActions .btn-bulk').forEach(button => { button.disabled = selected === 0; });
+        const selectAll = document.getElementById('selectAllIssues');
+        const boxes = document.querySelectorAll('#issuesTable tbody .issue-select');
+        selectAll.checked = boxes.length > 0 && selected === boxes.length;
+    }
+
+    // Status changes need the DASHBOARD_TOKEN of the server, asked for once
+    // and kept in the browser
+    function dashboardToken(askAgain) {
+        let token = localStorage.getItem('dashboardToken');
+        if (!token || askAgain) {
+            token = prompt('Dashboard token, needed to change the status of issues:');
+            if (token) {
+                localStorage.setItem('dashboardToken', token);
+            }
+        }
+        return token;
+    }
+
+    function changeSelectedStatus(status, askAgain = false) {
+        const ids = selectedIssueIds();
+        if (ids.length === 0) {
+            return;
+        }
+        const token = dashboardToken(askAgain);
+        if (!token) {
+            return;
+        }
+        fetch('/issues/status', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'X-Dashboard-Token': token },
+            body: JSON.stringify({ ids: ids, status: status }),
+        })
+            .then(response => {
+                if (response.status === 401) {
+                    localStorage.removeItem('dashboardToken');
+                    changeSelectedStatus(status, true);
+                    return null;
+                }
+                if (!response.ok) {
+                    throw new Error(`Server returned status: ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(data => {
+                if (!data) {
+                    return;
+                }
+                // The counters follow through the live updates
+                data.changed.forEach(issueId => {
+                    const row = document.querySelector(`#issuesTable tbody tr[data-id="${issueId}"]`);
+                    if (row) {
+                        row.cells[STATUS_CELL].innerHTML = statusBadge(data.status);
+                    }
+                });
+                document.querySelectorAll('#issuesTable tbody .issue-select:checked').forEach(box => { box.checked = false; });
+                updateBulkActions();
+            })
+            .catch(error => {
+                console.error("Error changing issue status:", error);
+                displayError("Error changing the status of the selected issues. Please try again.");
+            });
+    }
+
+    const issuesTable = document.getElementById('issuesTable');
+    if (issuesTable) {
+        issuesTable.addEventListener('change', function(e) {
+            if (e.target.id === 'selectAllIssues') {
+                document.querySelectorAll('#issuesTable tbody .issue-select').forEach(box => { box.checked = e.target.checked; });
+            }
+            updateBulkActions();
+        });
+        document.querySelectorAll('#bulkActions .btn-bulk').forEach(button => {
+            button.addEventListener('click', () => changeSelectedStatus(button.dataset.status));
+        });
+    }
+
+    // Analytics page: pre-aggregated series and time-to-resolution stats
+    const analyticsChart = document.getElementById('analyticsChart');
+    const analyticsRange = document.getElementById('analyticsRange');
+
+    function drawAnalyticsChart(series) {
+        const SVG_NS = 'http://www.w3.org/2000/svg';
+        const width = 1000, height = 240;
+        const peak = Math.max(1, ...series.map(point => Math.max(point.submitted, point.resolved)));
+        const slot = width / Math.max(series.length, 1);
+        const svg = document.createElementNS(SVG_NS, 'svg');
+        svg.setAttribute('viewBox', `0 0 ${width} ${height}`);
+        svg.setAttribute('preserveAspectRatio', 'none');
+        series.forEach((point, i) => {
+            [['submitted', 0], ['resolved', 1]].forEach(([field, offset]) => {
+                const barHeight = point[field] / peak * (height - 10);
+                const bar = document.createElementNS(SVG_NS, 'rect');
+                bar.setAttribute('class', `bar-${field}`);
+                bar.setAttribute('x', i * slot + offset * slot / 2);
+                bar.setAttribute('y', height - barHeight);
+                bar.setAttribute('width', Math.max(slot / 2 - 1, 0.5));
+                bar.setAttribute('height', barHeight);
+                const title = document.createElementNS(SVG_NS, 'title');
+                title.textContent = `${formatTimestamp(point.start)}: ${point[field]} ${field}`;
+                bar.appendChild(title);
+                svg.appendChild(bar);
+            });
+        });
+        analyticsChart.innerHTML = '';
+        analyticsChart.appendChild(svg);
+    }
+
+    function fillTable(tableId, rows) {
+        const tbody = document.querySelector(`#${tableId} tbody`);
+        tbody.innerHTML = '';
+        rows.forEach(([label, value]) => {
+            const row = tbody.insertRow();
+            row.insertCell(0).textContent = label;
+            row.insertCell(1).textContent = value;
+        });
+    }
+
+    function fetchAnalytics() {
+        const [days, granularity] = analyticsRange.value.split(':');
+        const since = new Date(Date.now() - days * 24 * 3600 * 1000).toISOString();
+        fetch(`/analytics/data?granularity=${granularity}&since=${encodeURIComponent(since)}`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`Server returned status: ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(data => {
+                drawAnalyticsChart(data.series);
+                const hours = value => value === null ? '–' : `${value} h`;
+                const resolution = data.resolution;
+                fillTable('resolutionTable', [
+                    ['Resolved', resolution.count],
+                    ['Mean', hours(resolution.mean_hours)],
+                    ['Median (at most)', hours(resolution.p50_hours_at_most)],
+                    ['90th percentile (at most)', hours(resolution.p90_hours_at_most)],
+                    ['Longest', hours(resolution.max_hours)],
+                ]);
+                fillTable('issueTypesTable', Object.entries(data.issue_types).sort((a, b) => b[1] - a[1]));
+            })
+            .catch(error => {
+                console.error("Error fetching analytics:", error);
+                displayError("Error fetching the analytics. Please try again.");
+            });
+    }
+
+    if (analyticsChart && analyticsRange) {
+        analyticsRange.addEventListener('change', fetchAnalytics);
+        fetchAnalytics();
+    }
+
     let currentPage = 1;
     const ITEMS_PER_PAGE = 5;
+    const includeArchived = document.getElementById('includeArchived');
+
+    // Old resolved issues are archived on the server and only listed on demand
+    function archivedParam() {
+        return includeArchived && includeArchived.checked ? 'include' : 'exclude';
+    }
+    // pageCursors[i] is the `after` token that loads page i + 1
+    let pageCursors = [null];
 
     function fetchAndDisplayIssues(page = 1) {
-        fetch(`/get-issues?page=${page}&items_per_page=${ITEMS_PER_PAGE}`)
+        if (page === 1) {
+            pageCursors = [null];
+        }
+        const after = pageCursors[page - 1];
+        const params = new URLSearchParams({ items_per_page: ITEMS_PER_PAGE, archived: archivedParam() });
+        if (clusterFilter) {
+            params.set('cluster', clusterFilter._id);
+        }
+        if (after) {
+            params.set('after', after);
+        } else if (page > 1) {
+            params.set('page', page);
+        }
+        fetch(`/get-issues?${params}`)
             .then(response => {
                 if (!response.ok) {
                     throw new Error(`Server returned status: ${response.status}`);
@@ -100,40 +372,150 @@ document.addEventListener('DOMContentLoaded', function() {
                     const tbody = table.getElementsByTagName('tbody')[0];
                     tbody.innerHTML = '';
 
-                    data.issues.forEach(issue => {
-                        let newRow = tbody.insertRow();
+                    data.issues.forEach(issue => renderIssueRow(tbody, issue));
+                    updateBulkActions();
 
-                        let cell1 = newRow.insertCell(0);
-                        cell1.textContent = issue.submitted_at;
+                    currentPage = page;
+                    pageCursors[page] = data.next_after;
+                    setupPagination(page, Boolean(data.next_after));
+                }
+            })
+            .catch(error => {
+                console.error("Error fetching issues:", error);
+                displayError("Error fetching issues. Please try again.");
+            });
+    }
 
-                        let cell2 = newRow.insertCell(1);
-                        cell2.textContent = issue.user_id;
+    // Grouped view: reports with near-duplicate error logs, one row per group.
+    // Clicking a group lists its reports in the issue table.
+    const groupDuplicates = document.getElementById('groupDuplicates');
+    const clustersTable = document.getElementById('clustersTable');
+    const clusterFilterBar = document.getElementById('clusterFilter');
+    let clusterFilter = null;
 
-                        let cell3 = newRow.insertCell(2);
-                        cell3.textContent = issue.issue_type;
+    function fetchClusters(page = 1) {
+        fetch(`/get-clusters?page=${page}&items_per_page=${ITEMS_PER_PAGE}`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`Server returned status: ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(data => {
+                const tbody = clustersTable.getElementsByTagName('tbody')[0];
+                tbody.innerHTML = '';
+                data.clusters.forEach(cluster => {
+                    const row = tbody.insertRow();
+                    row.insertCell(0).textContent = cluster.count;
+                    row.insertCell(1).textContent = cluster.pending;
+                    row.insertCell(2).textContent = cluster.issue_type;
+                    row.insertCell(3).textContent = cluster.headline;
+                    row.insertCell(4).textContent = formatTimestamp(cluster.last_seen);
+                    row.addEventListener('click', () => showCluster(cluster));
+                });
+                setupPagination(page, Boolean(data.next_page));
+            })
+            .catch(error => {
+                console.error("Error fetching grouped issues:", error);
+                displayError("Error fetching the grouped issues. Please try again.");
+            });
+    }
 
-                        let cell4 = newRow.insertCell(3);
-                        cell4.textContent = issue.description;
+    function setGrouped(grouped) {
+        groupDuplicates.checked = grouped;
+        clustersTable.hidden = !grouped;
+        document.getElementById('issuesTable').hidden = grouped;
+        if (grouped) {
+            clusterFilter = null;
+            clusterFilterBar.hidden = true;
+            fetchClusters(1);
+        } else {
+            fetchAndDisplayIssues(1);
+        }
+    }
 
-                        let cell5 = newRow.insertCell(4);
-                        cell5.textContent = issue.reproduce;
+    function showCluster(cluster) {
+        clusterFilter = cluster;
+        document.getElementById('clusterFilterHeadline').textContent = `${cluster.headline} (${cluster.count})`;
+        clusterFilterBar.hidden = false;
+        setGrouped(false);
+    }
 
-                        let cell6 = newRow.insertCell(5);
-                        cell6.textContent = issue.log;
+    if (groupDuplicates && clustersTable) {
+        groupDuplicates.addEventListener('change', () => setGrouped(groupDuplicates.checked));
+        document.getElementById('clearClusterFilter').addEventListener('click', function() {
+            clusterFilter = null;
+            clusterFilterBar.hidden = true;
+            fetchAndDisplayIssues(1);
+        });
+    }
 
-                        let cell7 = newRow.insertCell(6);
-                        let badgeClass = issue.status === 'pending' ? 'badge-warning' : issue.status === 'resolved' ? 'badge-success' : 'badge-danger';
-                        cell7.innerHTML = `<span class="badge ${badgeClass}">${issue.status}</span>`;
-                    });
+    // Live updates pushed by the server; EventSource reconnects on its own
+    // and resends the last event id so missed updates are replayed.
+    function applyCounterDelta(selector, delta) {
+        const card = document.querySelector(selector);
+        if (card && delta && card.textContent !== '') {
+            card.textContent = parseInt(card.textContent) + delta;
+        }
+    }
 
-                    const totalPages = Math.ceil(data.total_issues / ITEMS_PER_PAGE);
-                    setupPagination(totalPages, page);
-                }
-            })
-            .catch(error => {
-                console.error("Error fetching issues:", error);
-                displayError("Error fetching issues. Please try again.");
-            });
+    // When the server has no stream to spare it answers 503, which closes the
+    // EventSource for good: poll for a while, then try streaming again.
+    const POLL_INTERVAL = 30000;
+    const POLL_DURATION = 300000;
+
+    function pollForUpdates() {
+        const poller = setInterval(function() {
+            // Refreshing would replace the search results or grouped view being read
+            const searching = filterInput && filterInput.value.trim();
+            if (!searching && !(groupDuplicates && groupDuplicates.checked)) {
+                fetchAndDisplayIssues(currentPage);
+            }
+            fetchIssueCounts();
+        }, POLL_INTERVAL);
+        setTimeout(function() {
+            clearInterval(poller);
+            subscribeToEvents();
+        }, POLL_DURATION);
+    }
+
+    function subscribeToEvents() {
+        if (!window.EventSource || !document.getElementById('issuesTable')) {
+            return;
+        }
+        const source = new EventSource('/events');
+
+        source.addEventListener('error', function() {
+            if (source.readyState === EventSource.CLOSED) {
+                pollForUpdates();
+            }
+        });
+
+        source.addEventListener('issue_created', function(e) {
+            // Only the newest page can contain a brand new issue. The row is
+            // prepended without dropping the last one so paging stays intact.
+            const issue = JSON.parse(e.data);
+            if (currentPage !== 1 || (clusterFilter && issue.cluster_id !== clusterFilter._id)) {
+                return;
+            }
+            const tbody = document.querySelector('#issuesTable tbody');
+            renderIssueRow(tbody, issue, 0);
+        });
+
+        source.addEventListener('issue_status_changed', function(e) {
+            const data = JSON.parse(e.data);
+            const row = document.querySelector(`#issuesTable tbody tr[data-id="${data._id}"]`);
+            if (row) {
+                row.cells[STATUS_CELL].innerHTML = statusBadge(data.status);
+            }
+        });
+
+        source.addEventListener('counters', function(e) {
+            const delta = JSON.parse(e.data);
+            applyCounterDelta('.card.bg-primary .card-title', delta.total);
+            applyCounterDelta('.card.bg-warning .card-title', delta.pending);
+            applyCounterDelta('.card.bg-success .card-title', delta.resolved);
+        });
     }
 
     fetchAndDisplayIssues(currentPage);
@@ -149,20 +531,62 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     const filterInput = document.getElementById('filterInput');
+
+    function searchIssues(searchText) {
+        const params = new URLSearchParams({ q: searchText, items_per_page: ITEMS_PER_PAGE * 4, archived: archivedParam() });
+        fetch(`/search?${params}`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`Server returned status: ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(data => {
+                // Ignore answers to searches the user has typed past
+                if (filterInput.value.trim() !== searchText) {
+                    return;
+                }
+                const tbody = document.querySelector('#issuesTable tbody');
+                tbody.innerHTML = '';
+                data.issues.forEach(issue => renderIssueRow(tbody, issue));
+                updateBulkActions();
+                currentPage = 0;  // search results are not a page of the listing
+                document.getElementById('paginationControls').innerHTML = '';
+            })
+            .catch(error => {
+                console.error("Error searching issues:", error);
+                displayError("Error searching issues. Please try again.");
+            });
+    }
+
     if (filterInput) {
+        // Searches the whole issue history on the server, once typing pauses
+        let searchTimer = null;
         filterInput.addEventListener('input', function() {
-            const filterValue = this.value.toLowerCase();
-            const rows = document.querySelectorAll('#issuesTable tbody tr');
-            rows.forEach(row => {
-                const description = row.cells[3].textContent.toLowerCase();
-                if (description.includes(filterValue)) {
-                    row.style.display = '';
+            clearTimeout(searchTimer);
+            const searchText = this.value.trim();
+            searchTimer = setTimeout(() => {
+                if (searchText) {
+                    searchIssues(searchText);
                 } else {
-                    row.style.display = 'none';
+                    fetchAndDisplayIssues(1);
                 }
-            });
+            }, 300);
         });
     }
 
+    if (includeArchived) {
+        includeArchived.addEventListener('change', function() {
+            const searchText = filterInput ? filterInput.value.trim() : '';
+            if (searchText) {
+                searchIssues(searchText);
+            } else {
+                fetchAndDisplayIssues(1);
+            }
+        });
+    }
+
+    subscribeToEvents();
+
     setActiveNavLink();
 });
\ No newline at end of file
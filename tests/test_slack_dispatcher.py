@@ -0,0 +1,107 @@
+import pytest
+from slack_sdk.errors import SlackApiError
+
+import slack_dispatcher
+from slack_dispatcher import SlackDispatcher, TokenBucket, retry_after
+
+
+class FakeClock:
+    """Stands in for the time module: sleeping only moves the clock forward."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    perf_counter = monotonic
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class RateLimitedResponse:
+    status_code = 429
+
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class RateLimitedClient:
+    """Answers 429 to the first `failures` calls, recording when each call was made."""
+
+    def __init__(self, clock, failures, headers):
+        self.clock = clock
+        self.failures = failures
+        self.headers = headers
+        self.called_at = []
+
+    def api_call(self, api_method, **kwargs):
+        self.called_at.append(self.clock.now)
+        if len(self.called_at) <= self.failures:
+            raise SlackApiError("ratelimited", RateLimitedResponse(self.headers))
+        return {"ok": True}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(slack_dispatcher, "time", clock)
+    return clock
+
+
+def test_token_bucket_allows_a_burst_then_the_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert clock.now == pytest.approx(0.5)
+
+
+def test_token_bucket_refills_up_to_its_capacity(clock):
+    bucket = TokenBucket(rate=1, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 10
+    assert [bucket.acquire() for _ in range(2)] == [0, 0]
+    assert bucket.acquire() == pytest.approx(1)
+
+
+def test_token_bucket_pause(clock):
+    bucket = TokenBucket(rate=1, capacity=5)
+    bucket.pause(3)
+    assert bucket.acquire() == pytest.approx(3)
+
+
+def test_retry_after_is_case_insensitive():
+    assert retry_after({"retry-after": "7"}, 2) == 7
+    assert retry_after({"Retry-After": "1.5"}, 2) == 1.5
+    assert retry_after({}, 2) == 2
+    assert retry_after(None, 4) == 4
+
+
+@pytest.mark.parametrize("throttle", [True, False])
+def test_rate_limited_calls_wait_for_retry_after(clock, throttle):
+    client = RateLimitedClient(clock, failures=2, headers={"retry-after": "2"})
+    dispatcher = SlackDispatcher(client, throttle=throttle)
+    assert dispatcher.call("users.info", params={"user": "U1"}) == {"ok": True}
+    assert client.called_at == pytest.approx([0, 2, 4])
+    assert dispatcher.stats()["users.info"]["rate_limited"] == 2
+
+
+@pytest.mark.parametrize("throttle", [True, False])
+def test_rate_limited_calls_back_off_without_retry_after(clock, throttle):
+    client = RateLimitedClient(clock, failures=2, headers={})
+    dispatcher = SlackDispatcher(client, throttle=throttle)
+    dispatcher.call("users.info")
+    assert client.called_at == pytest.approx([0, 2, 6])
+
+
+def test_rate_limited_calls_give_up_after_max_retries(clock):
+    client = RateLimitedClient(clock, failures=5, headers={"Retry-After": "1"})
+    dispatcher = SlackDispatcher(client, max_retries=2, throttle=False)
+    with pytest.raises(SlackApiError):
+        dispatcher.call("users.info")
+    assert len(client.called_at) == 3
+    assert dispatcher.stats()["users.info"]["errors"] == 1